@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import math
 import sqlite3
+import threading
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import altair as alt
 import json
 
@@ -13,124 +16,250 @@ st.set_page_config(
 )
 
 DB_PATH = "smoke_detector.db"
+WINDOW_POINTS = 10000  # time buckets fetched per atlaspc for the plot window
+PLOT_POINTS = 2000  # points kept per sensor trace when downsampling
+
+@st.cache_resource
+def get_conn():
+    """Get the shared database connection, opened with WAL and read-tuning pragmas"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    conn.executescript('''
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA busy_timeout=30000;
+        PRAGMA cache_size=-65536;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA mmap_size=268435456;
+    ''')
+    return conn
+
+@st.cache_resource
+def get_write_lock():
+    """Get the lock serializing writes on the shared connection across sessions"""
+    return threading.Lock()
+
+def _utc_cutoff(hours):
+    """Get the UTC timestamp `hours` ago, formatted like SQLite's CURRENT_TIMESTAMP"""
+    return (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+
+def _atlaspc_cte(atlaspcs):
+    """Build a CTE `p(atlaspc)` binding one placeholder per atlaspc"""
+    return 'WITH p(atlaspc) AS (VALUES ' + ', '.join(['(?)'] * len(atlaspcs)) + ')'
 
 @st.cache_data(ttl=1)  # Cache for 1 second
 def get_active_atlaspcs():
     """Get list of active atlaspcs"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         query = '''
-            SELECT DISTINCT atlaspc 
+            SELECT DISTINCT +atlaspc AS atlaspc
             FROM readings 
-            WHERE datetime(timestamp) > datetime('now', '-24 hours')
+            WHERE timestamp > ?
             ORDER BY atlaspc
         '''
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        df = pd.read_sql_query(query, conn, params=(_utc_cutoff(24),))
         return df['atlaspc'].tolist() if not df.empty else []
     except Exception as e:
         st.error(f"Database error: {e}")
         return []
 
 @st.cache_data(ttl=1)  # Cache for 1 second
-def get_recent_data(atlaspc, hours=10):
-    """Get recent readings from database for a specific atlaspc"""
+def get_data_version():
+    """Get a token that changes whenever new readings are inserted"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
+        return conn.execute('SELECT MAX(rowid) FROM readings').fetchone()[0]
+    except:
+        return None
+
+def get_recent_data_all(hours=10):
+    """Get recent readings from database for all atlaspcs, keyed by atlaspc; cached through get_plot_data_all"""
+    try:
+        conn = get_conn()
+        # Average readings into time buckets sized so the whole window fits in WINDOW_POINTS rows
+        bucket_seconds = max(1, math.ceil(hours * 3600 / WINDOW_POINTS))
         query = '''
-            SELECT timestamp, atlaspc, R, G, IR 
-            FROM readings 
-            WHERE atlaspc = ? 
-            AND datetime(timestamp) > datetime('now', '-{} hours')
-            ORDER BY timestamp DESC
-            LIMIT 10000
-        '''.format(hours)
-        df = pd.read_sql_query(query, conn, params=(atlaspc,))
-        conn.close()
-        if not df.empty:
-            df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize('UTC').dt.tz_convert('America/New_York')
-        return df
+            SELECT CAST(strftime('%s', timestamp) AS INTEGER) / ? * ? AS epoch, atlaspc,
+                   CAST(ROUND(AVG(R)) AS INTEGER) AS R,
+                   CAST(ROUND(AVG(G)) AS INTEGER) AS G,
+                   CAST(ROUND(AVG(IR)) AS INTEGER) AS IR
+            FROM readings
+            WHERE timestamp > ?
+            -- +atlaspc keeps the planner on the covering timestamp index
+            GROUP BY +atlaspc, epoch
+            ORDER BY atlaspc, epoch DESC
+        '''
+        rows = conn.execute(query, (bucket_seconds, bucket_seconds, _utc_cutoff(hours))).fetchall()
+        if not rows:
+            return {}
+        
+        # Build the frame column by column instead of letting pandas infer from row tuples.
+        # Every column is an integer, so the rows are unpacked into one array in a single pass.
+        # SQLite hands back epoch seconds so no string parsing is needed, and
+        # MAX30101 counts are 18-bit, so int32 is the narrowest type that holds them
+        n = len(rows)
+        arr = np.fromiter((v for row in rows for v in row), dtype=np.int64, count=n * 5).reshape(n, 5)
+        df = pd.DataFrame({
+            'timestamp': pd.to_datetime(arr[:, 0], unit='s', utc=True).tz_convert('America/New_York'),
+            'atlaspc': arr[:, 1],
+            'R': arr[:, 2].astype(np.int32),
+            'G': arr[:, 3].astype(np.int32),
+            'IR': arr[:, 4].astype(np.int32),
+        })
+        return {atlaspc: group for atlaspc, group in df.groupby('atlaspc', sort=False)}
     except Exception as e:
         st.error(f"Database error: {e}")
-        return pd.DataFrame()
+        return {}
 
-@st.cache_data(ttl=30)  # Cache for 30 seconds
-def get_current_stats(atlaspc):
-    """Get current statistics for a specific atlaspc"""
+@st.cache_data(ttl=1)  # Cache for 1 second
+def get_latest_reading(atlaspc):
+    """Get the most recent (timestamp, R, G, IR) reading for a specific atlaspc, or None"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         query = '''
-            SELECT * FROM statistics 
+            SELECT CAST(strftime('%s', timestamp) AS INTEGER), R, G, IR
+            FROM readings
             WHERE atlaspc = ?
-            ORDER BY timestamp DESC 
+            ORDER BY timestamp DESC
             LIMIT 1
         '''
-        df = pd.read_sql_query(query, conn, params=(atlaspc,))
-        conn.close()
-        return df
+        row = conn.execute(query, (atlaspc,)).fetchone()
+        if row is None:
+            return None
+        epoch, R, G, IR = row
+        return pd.Timestamp(epoch, unit='s', tz='UTC').tz_convert('America/New_York'), R, G, IR
+    except Exception as e:
+        st.error(f"Database error: {e}")
+        return None
+
+@st.cache_data(ttl=30)  # Cache for 30 seconds
+def get_current_stats_all(atlaspcs):
+    """Get current statistics for the given atlaspcs, keyed by atlaspc"""
+    try:
+        conn = get_conn()
+        # One index probe per atlaspc on (atlaspc, timestamp) rather than a scan of the whole table
+        query = _atlaspc_cte(atlaspcs) + '''
+            SELECT s.timestamp, s.atlaspc, s.R_mean, s.R_std, s.G_mean, s.G_std, s.IR_mean, s.IR_std
+            FROM p
+            JOIN statistics s ON s.id = (
+                SELECT id FROM statistics
+                WHERE atlaspc = p.atlaspc
+                ORDER BY timestamp DESC, id DESC
+                LIMIT 1
+            )
+            ORDER BY s.id DESC
+        '''
+        df = pd.read_sql_query(query, conn, params=tuple(atlaspcs))
+        return {atlaspc: group for atlaspc, group in df.groupby('atlaspc', sort=False)}
     except:
-        return pd.DataFrame()
+        return {}
 
 @st.cache_data(ttl=5)  # Cache for 5 seconds
-def get_recent_alerts(atlaspc=None, limit=20):
-    """Get recent alerts, optionally filtered by atlaspc"""
+def get_recent_alerts_all(atlaspcs, limit=20):
+    """Get the most recent alerts of the given atlaspcs, keyed by atlaspc"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        if atlaspc is not None:
-            query = '''
-                SELECT * FROM alerts 
-                WHERE atlaspc = ?
-                ORDER BY timestamp DESC 
+        conn = get_conn()
+        # Each atlaspc reads only its newest `limit` entries of the (atlaspc, timestamp) index
+        query = _atlaspc_cte(atlaspcs) + '''
+            SELECT CAST(strftime('%s', a.timestamp) AS INTEGER) AS timestamp, a.atlaspc, a.alert_type, a.message,
+                   a.R_value, a.G_value, a.IR_value, a.R_zscore, a.G_zscore, a.IR_zscore
+            FROM p
+            JOIN alerts a ON a.id IN (
+                SELECT id FROM alerts
+                WHERE atlaspc = p.atlaspc
+                ORDER BY timestamp DESC
                 LIMIT ?
-            '''
-            df = pd.read_sql_query(query, conn, params=(atlaspc, limit))
-        else:
-            query = '''
-                SELECT * FROM alerts 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            '''
-            df = pd.read_sql_query(query, conn, params=(limit,))
-        conn.close()
+            )
+            ORDER BY a.atlaspc, a.timestamp DESC
+        '''
+        df = pd.read_sql_query(query, conn, params=(*atlaspcs, limit))
         if not df.empty:
-            df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize('UTC').dt.tz_convert('America/New_York')
-        return df
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s', utc=True).dt.tz_convert('America/New_York')
+            df['ts_str'] = df['timestamp'].dt.strftime("%Y-%m-%d %H:%M:%S")
+            z_cols = ['R_zscore', 'G_zscore', 'IR_zscore']
+            df[z_cols] = df[z_cols].astype(np.float32)
+        return {atlaspc: group for atlaspc, group in df.groupby('atlaspc', sort=False)}
     except:
-        return pd.DataFrame()
+        return {}
 
-def get_setting(key):
-    """Get setting from database"""
+@st.cache_data(ttl=2)  # Cache for 2 seconds
+def get_all_settings():
+    """Get all settings from database as a dict"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT value FROM settings WHERE key = ?', (key,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else None
+        conn = get_conn()
+        return dict(conn.execute('SELECT key, value FROM settings').fetchall())
     except:
-        return None
+        return {}
 
 def update_setting(key, value):
     """Update setting in database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, value))
-        conn.commit()
-        conn.close()
+        conn = get_conn()
+        with get_write_lock(), conn:
+            conn.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, value))
+        get_all_settings.clear()
         return True
     except Exception as e:
         st.error(f"Failed to update setting: {e}")
         return False
 
+def _lttb_indices(x, y, n_out):
+    """Get indices of the n_out points that best preserve the shape of y(x) (Largest-Triangle-Three-Buckets)"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # First and last points are always kept, interior points are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        
+        # Keep the point forming the largest triangle with the previous pick and the next bucket's average
+        areas = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+def downsample_readings(df, n_out=PLOT_POINTS):
+    """Downsample readings for plotting, keeping the union of the LTTB points of each sensor"""
+    if len(df) <= 1.5 * n_out:
+        return df
+    
+    df = df.sort_values('timestamp')
+    x = df['timestamp'].values.astype(np.int64)
+    x = (x - x[0]).astype(np.float64)
+    
+    keep = set()
+    for sensor in ['R', 'G', 'IR']:
+        keep.update(_lttb_indices(x, df[sensor].to_numpy(dtype=np.float64), n_out).tolist())
+    return df.iloc[sorted(keep)]
+
+@st.cache_data(ttl=60)  # Recomputed when data_version changes, at the latest after 60 seconds
+def get_plot_data_all(hours=10, data_version=None):
+    """Get downsampled plot frames for all atlaspcs, keyed by atlaspc"""
+    recent_data = get_recent_data_all(hours=hours)
+    return {atlaspc: downsample_readings(df)[['timestamp', 'R', 'G', 'IR']]
+            for atlaspc, df in recent_data.items()}
+
 # Main interface
 st.title("Monitoring Dashboard")
 
 # Sidebar controls
 st.sidebar.title("Control Panel")
 
+settings = get_all_settings()
+
 # Monitoring control
-monitoring_active = get_setting('monitoring_active') == 'true'
+monitoring_active = settings.get('monitoring_active') == 'true'
 st.sidebar.metric("Status", "🟢 Active" if monitoring_active else "🔴 Inactive")
 
 col1, col2 = st.sidebar.columns(2)
@@ -149,30 +278,43 @@ with col2:
 # Settings
 st.sidebar.subheader("Settings")
 
+# Seed widget state from the database once per session, then only write on change
+st.session_state.setdefault('email_enabled', settings.get('email_enabled') == 'true')
+st.session_state.setdefault('email_recipients', settings.get('email_recipients') or '')
+st.session_state.setdefault('auto_shutdown_enabled', settings.get('auto_shutdown_enabled') == 'true')
+
+def _save_flag(key):
+    """Persist a checkbox setting from session state"""
+    update_setting(key, 'true' if st.session_state[key] else 'false')
+
+def _save_text(key):
+    """Persist a text setting from session state"""
+    update_setting(key, st.session_state[key])
+
 # Email settings
 email_enabled = st.sidebar.checkbox(
     "Enable Email Notifications",
-    value=get_setting('email_enabled') == 'true'
+    key='email_enabled',
+    on_change=_save_flag,
+    args=('email_enabled',)
 )
-if email_enabled != (get_setting('email_enabled') == 'true'):
-    update_setting('email_enabled', 'true' if email_enabled else 'false')
 
 if email_enabled:
-    email_recipients = st.sidebar.text_area(
+    st.sidebar.text_area(
         "Email Recipients (comma-separated)",
-        value=get_setting('email_recipients') or '',
+        key='email_recipients',
+        on_change=_save_text,
+        args=('email_recipients',),
         help="Enter email addresses separated by commas"
     )
-    if email_recipients != get_setting('email_recipients'):
-        update_setting('email_recipients', email_recipients)
 
 # Auto-shutdown settings
 auto_shutdown = st.sidebar.checkbox(
     "Enable Auto Power Shutdown",
-    value=get_setting('auto_shutdown_enabled') == 'true'
+    key='auto_shutdown_enabled',
+    on_change=_save_flag,
+    args=('auto_shutdown_enabled',)
 )
-if auto_shutdown != (get_setting('auto_shutdown_enabled') == 'true'):
-    update_setting('auto_shutdown_enabled', 'true' if auto_shutdown else 'false')
 
 if auto_shutdown:
     st.sidebar.warning("⚠️ Auto-shutdown ENABLED!")
@@ -181,117 +323,126 @@ if auto_shutdown:
 st.sidebar.subheader("Display Settings")
 hours_to_display = st.sidebar.slider("Hours of data to display", 1, 24, 10)
 
-# Get active atlaspcs
-active_atlaspcs = get_active_atlaspcs()
+@st.fragment(run_every=5)
+def live_panel(hours_to_display):
+    """Render the live per-atlaspc readings, statistics and alerts, refreshed every 5 seconds"""
+    # Get active atlaspcs
+    active_atlaspcs = get_active_atlaspcs()
 
-if not active_atlaspcs:
-    st.warning("No active atlaspcs detected. Make sure the monitoring script is running and sensors are connected.")
-else:
-    # Display overview of all atlaspcs
-    st.subheader(f"Active Channels: {len(active_atlaspcs)}")
-    
-    st.divider()
-    
-    # Display each atlaspc in detail
-    for atlaspc in active_atlaspcs:
-        st.header(f"atlaspc{atlaspc}")
+    if not active_atlaspcs:
+        st.warning("No active atlaspcs detected. Make sure the monitoring script is running and sensors are connected.")
+    else:
+        # Display overview of all atlaspcs
+        st.subheader(f"Active Channels: {len(active_atlaspcs)}")
+        
+        st.divider()
         
-        df = get_recent_data(atlaspc, hours=hours_to_display)
-        stats_df = get_current_stats(atlaspc)
-        alerts_df = get_recent_alerts(atlaspc=atlaspc, limit=10)
+        # Fetch all atlaspcs at once, one query per table
+        plot_data = get_plot_data_all(hours=hours_to_display, data_version=get_data_version())
+        current_stats = get_current_stats_all(tuple(active_atlaspcs))
+        recent_alerts = get_recent_alerts_all(tuple(active_atlaspcs), limit=10)
         
-        if not df.empty:
-            # Current readings
-            col1, col2, col3, col4 = st.columns(4)
-            latest = df.iloc[0]
+        # Display each atlaspc in detail
+        for atlaspc in active_atlaspcs:
+            st.header(f"atlaspc{atlaspc}")
             
-            with col1:
-                st.metric("Red", latest.get('R', 'N/A'))
-            with col2:
-                st.metric("Green", latest.get('G', 'N/A'))
-            with col3:
-                st.metric("IR", latest.get('IR', 'N/A'))
-            with col4:
-                st.metric("Last Update", latest['timestamp'].strftime("%H:%M:%S"))
+            df_plot = plot_data.get(atlaspc, pd.DataFrame())
+            stats_df = current_stats.get(atlaspc, pd.DataFrame())
+            alerts_df = recent_alerts.get(atlaspc, pd.DataFrame())
             
-            # Statistics
-            if not stats_df.empty:
-                st.subheader(f"Statistics")
-                stats = stats_df.iloc[0]
-                col1, col2, col3 = st.columns(3)
+            latest = get_latest_reading(atlaspc)
+            
+            if not df_plot.empty and latest is not None:
+                # Current readings
+                col1, col2, col3, col4 = st.columns(4)
+                latest_ts, latest_R, latest_G, latest_IR = latest
                 
                 with col1:
-                    st.write("Red")
-                    if pd.notna(stats.get('R_mean')):
-                        st.write(r"$\mu$: "+f"{stats['R_mean']:.2f}")
-                        st.write(r"$\sigma$: "+f"{stats['R_std']:.2f}")
-                
+                    st.metric("Red", latest_R)
                 with col2:
-                    st.write("Green")
-                    if pd.notna(stats.get('G_mean')):
-                        st.write(r"$\mu$: "+f"{stats['G_mean']:.2f}")
-                        st.write(r"$\sigma$: "+f"{stats['G_std']:.2f}")
-                
+                    st.metric("Green", latest_G)
                 with col3:
-                    st.write("IR")
-                    if pd.notna(stats.get('IR_mean')):
-                        st.write(r"$\mu$: "+f"{stats['IR_mean']:.2f}")
-                        st.write(r"$\sigma$: "+f"{stats['IR_std']:.2f}")
-            
-            # Time series plot for this atlaspc
-            st.subheader(f"Readings")
-            
-            # Prepare data for plotting
-            df_plot = df.melt(id_vars=['timestamp'], 
-                             value_vars=['R', 'G', 'IR'],
-                             var_name='Sensor', 
-                             value_name='Value')
-            
-            chart = alt.Chart(df_plot).mark_line().encode(
-                x=alt.X('timestamp:T', title='Time'),
-                y=alt.Y('Value:Q', title= 'Value [a.u.]'),
-                color=alt.Color('Sensor:N', 
-                               scale=alt.Scale(domain=['R', 'G', 'IR'], 
-                                             range=['red', 'green', 'purple']))
-            ).properties(height=300).interactive()
-            
-            st.altair_chart(chart, use_container_width=True)
-            
-            # atlaspc-specific alerts
-            if not alerts_df.empty:
-                st.subheader(f"atlaspc{atlaspc} - Recent Alerts")
+                    st.metric("IR", latest_IR)
+                with col4:
+                    st.metric("Last Update", latest_ts.strftime("%H:%M:%S"))
                 
-                for _, alert in alerts_df.iterrows():
-                    alert_type = alert['alert_type']
-                    timestamp = alert['timestamp'].strftime("%Y-%m-%d %H:%M:%S")
+                # Statistics
+                if not stats_df.empty:
+                    st.subheader(f"Statistics")
+                    stats = stats_df.iloc[0]
+                    col1, col2, col3 = st.columns(3)
                     
-                    if alert_type == 'CRITICAL':
-                        st.error(f"**{timestamp} - {alert_type}**: {alert['message']}")
-                    elif alert_type == 'WARNING':
-                        st.warning(f"**{timestamp} - {alert_type}**: {alert['message']}")
-                    else:
-                        st.info(f"**{timestamp} - {alert_type}**: {alert['message']}")
+                    with col1:
+                        st.write("Red")
+                        if pd.notna(stats.get('R_mean')):
+                            st.write(r"$\mu$: "+f"{stats['R_mean']:.2f}")
+                            st.write(r"$\sigma$: "+f"{stats['R_std']:.2f}")
                     
-                    # Show details
-                    if pd.notna(alert['R_value']):
-                        with st.expander(f"Details for {timestamp}"):
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.write("**Raw Values:**")
-                                st.write(f"R: {alert['R_value']}")
-                                st.write(f"G: {alert['G_value']}")
-                                st.write(f"IR: {alert['IR_value']}")
-                            with col2:
-                                st.write("**Z-Scores:**")
-                                if pd.notna(alert['R_zscore']):
-                                    st.write(f"R: {alert['R_zscore']:.2f}")
-                                    st.write(f"G: {alert['G_zscore']:.2f}")
-                                    st.write(f"IR: {alert['IR_zscore']:.2f}")
-        else:
-            st.warning(f"No recent data available for atlaspc{atlaspc}.")
-        
-        st.divider()
+                    with col2:
+                        st.write("Green")
+                        if pd.notna(stats.get('G_mean')):
+                            st.write(r"$\mu$: "+f"{stats['G_mean']:.2f}")
+                            st.write(r"$\sigma$: "+f"{stats['G_std']:.2f}")
+                    
+                    with col3:
+                        st.write("IR")
+                        if pd.notna(stats.get('IR_mean')):
+                            st.write(r"$\mu$: "+f"{stats['IR_mean']:.2f}")
+                            st.write(r"$\sigma$: "+f"{stats['IR_std']:.2f}")
+                
+                # Time series plot for this atlaspc
+                st.subheader(f"Readings")
+                
+                # Fold the wide R/G/IR columns on the Vega side
+                chart = alt.Chart(df_plot).transform_fold(
+                    ['R', 'G', 'IR'], as_=['Sensor', 'Value']
+                ).mark_line().encode(
+                    x=alt.X('timestamp:T', title='Time'),
+                    y=alt.Y('Value:Q', title= 'Value [a.u.]'),
+                    color=alt.Color('Sensor:N', 
+                                   scale=alt.Scale(domain=['R', 'G', 'IR'], 
+                                                 range=['red', 'green', 'purple']))
+                ).properties(height=300).interactive()
+                
+                st.altair_chart(chart, use_container_width=True)
+                
+                # atlaspc-specific alerts
+                if not alerts_df.empty:
+                    st.subheader(f"atlaspc{atlaspc} - Recent Alerts")
+                    
+                    for alert in alerts_df.itertuples(index=False):
+                        alert_type = alert.alert_type
+                        timestamp = alert.ts_str
+                        
+                        if alert_type == 'CRITICAL':
+                            st.error(f"**{timestamp} - {alert_type}**: {alert.message}")
+                        elif alert_type == 'WARNING':
+                            st.warning(f"**{timestamp} - {alert_type}**: {alert.message}")
+                        else:
+                            st.info(f"**{timestamp} - {alert_type}**: {alert.message}")
+                        
+                        # Show details
+                        if pd.notna(alert.R_value):
+                            with st.expander(f"Details for {timestamp}"):
+                                col1, col2 = st.columns(2)
+                                with col1:
+                                    st.write("**Raw Values:**")
+                                    st.write(f"R: {alert.R_value}")
+                                    st.write(f"G: {alert.G_value}")
+                                    st.write(f"IR: {alert.IR_value}")
+                                with col2:
+                                    st.write("**Z-Scores:**")
+                                    if pd.notna(alert.R_zscore):
+                                        st.write(f"R: {alert.R_zscore:.2f}")
+                                        st.write(f"G: {alert.G_zscore:.2f}")
+                                        st.write(f"IR: {alert.IR_zscore:.2f}")
+            else:
+                st.warning(f"No recent data available for atlaspc{atlaspc}.")
+            
+            st.divider()
+
+live_panel(hours_to_display)
 
 # Refresh info
 st.sidebar.divider()
-st.sidebar.info("💡 Data refreshes automatically due to caching. Use browser refresh to update the view.")
\ No newline at end of file
+st.sidebar.info("💡 Live data refreshes automatically every 5 seconds.")
\ No newline at end of file
@@ -1,6 +1,6 @@
 import numpy as np
+import math
 import time
-import sys
 import serial
 import smtplib
 from email.mime.text import MIMEText
@@ -8,142 +8,242 @@ import yaml
 import sqlite3
 from datetime import datetime
 import logging
-import os
+import logging.handlers
+import re
 import argparse
+import queue
+import threading
+from collections import deque
+
+# Positions of the light types in each channel's statistics arrays
+R, G, IR = 0, 1, 2
+LIGHT_TYPES = ('R', 'G', 'IR')
+
+# Arduino data frame, e.g. b"CH:0;R:1234;IR:5678;G:910;..."
+FRAME_RE = re.compile(rb'CH:\s*(\d+)\s*;\s*R:\s*(\d+)\s*;\s*IR:\s*(\d+)\s*;\s*G:\s*(\d+)\s*;')
+
+class EmailSender:
+    """Sends queued email from a background thread so SMTP never blocks the monitor loop"""
+    
+    def __init__(self, host='localhost'):
+        self.host = host
+        self._smtp = None  # kept open between messages, only touched by the worker thread
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name='email-sender', daemon=True)
+        self._thread.start()
+    
+    def send(self, sender, recipients, msg, logger):
+        """Queue a message; the outcome is logged to logger once it has been sent"""
+        self._queue.put((sender, recipients, msg, logger))
+    
+    def _worker(self):
+        """Deliver queued messages until the stop sentinel arrives"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            sender, recipients, msg, logger = item
+            try:
+                try:
+                    self._connection().sendmail(sender, recipients, msg.as_string())
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    # The kept connection went away mid-send; retry once on a fresh one
+                    self._disconnect()
+                    self._connection().sendmail(sender, recipients, msg.as_string())
+                logger.info(f"Email sent to {recipients}: {msg['Subject']}")
+            except Exception as e:
+                logger.error(f"Failed to send email: {e}")
+        self._disconnect(quit=True)
+    
+    def _connection(self):
+        """Return the open SMTP connection, reconnecting if a NOOP shows it has dropped"""
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._disconnect()
+        self._smtp = smtplib.SMTP(self.host)
+        return self._smtp
+    
+    def _disconnect(self, quit=False):
+        """Drop the SMTP connection, politely with QUIT if requested"""
+        if self._smtp is None:
+            return
+        try:
+            if quit:
+                self._smtp.quit()
+            else:
+                self._smtp.close()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._smtp = None
+    
+    def close(self, timeout=30):
+        """Send whatever is still queued, then stop the worker"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
 
 class SmokeDetectorChannel:
     """Manages data and operations for a single smoke detector channel"""
     
-    def __init__(self, config, atlaspc, channel_number, db_path, settings):
+    # R, G, IR z-score summary shared by the alert emails
+    Z_SCORE_LINES = ('RED values are %.2f standard deviations from the mean.\n'
+                     'GREEN values are %.2f standard deviations from the mean.\n'
+                     'IR values are %.2f standard deviations from the mean.')
+    
+    def __init__(self, config, atlaspc, channel_number, settings, mailer, log_queue):
         self.atlaspc = atlaspc
         self.channel = channel_number
-        self.db_path = db_path
-        self.settings = settings
+        self.mailer = mailer
+        self.log_queue = log_queue
+        self.apply_settings(settings)
+        self._build_alert_texts()
         self.calculation_interval = config['calculation_interval'] * 60  # convert minutes to seconds
         
-        # Data storage
-        self.saved_values = {'R': [], 'G': [], 'IR': []}
-        self.means = {'R': None, 'G': None, 'IR': None}
-        self.sds = {'R': None, 'G': None, 'IR': None}
-        self.last_calculation_time = time.time()
+        # Running (count, mean, M2) per light type for Welford's online mean/variance, indexed by R, G, IR
+        self._running = [(0, 0.0, 0.0)] * 3
+        # Statistics as R, G, IR arrays, NaN until calibrated; 1/sd is also NaN while sd is zero
+        self.means = np.full(3, np.nan)
+        self.sds = np.full(3, np.nan)
+        self._inv_sigma = np.full(3, np.nan)
+        self.last_calculation_time = time.monotonic()  # monotonic, so wall-clock jumps cannot skew the interval
+        self.calibration_log_interval = 30  # seconds between "Calibrating..." log lines
+        self._last_calib_log = float('-inf')
         
         # Set up channel-specific logger
         self.logger = self._setup_logger()
         self.logger.info(f"Channel {self.channel} for atlaspc{self.atlaspc} initialized")
         
     def _setup_logger(self):
-        """Set up logger for this channel"""
-        logger = logging.getLogger(f'atlaspc{self.atlaspc}_ch{self.channel}')
+        """Set up logger for this channel, feeding the monitor's shared log queue"""
+        # The logger name identifies the channel in the shared log file
+        logger = logging.getLogger(f'atlaspc{self.atlaspc}.ch{self.channel}')
 
         # Set minimum severity level to INFO
         logger.setLevel(logging.INFO) 
         
         # Clear any existing handlers to prevent duplicate logs
         logger.handlers = []
+        logger.propagate = False
         
-        # Create file handler for this channel
-        fh = logging.FileHandler(f'smoke_detector_atlaspc{self.atlaspc}_ch{self.channel}.log')
-        fh.setLevel(logging.INFO)
-        
-        # Create formatter
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        fh.setFormatter(formatter)
-        
-        logger.addHandler(fh)
+        # Records are only enqueued here; the monitor's listener does the file writes
+        logger.addHandler(logging.handlers.QueueHandler(self.log_queue))
         return logger
     
+    def _build_alert_texts(self):
+        """Prebuild the parts of the alert messages that only depend on this channel"""
+        self._warning_alert = f'Concerning smoke levels detected on atlaspc{self.atlaspc}'
+        self._warning_subject = f'SMOKE LEVEL WARNING - atlaspc{self.atlaspc}'
+        self._warning_prefix = (f'Concerning smoke levels have been detected in the clean room on atlaspc{self.atlaspc}. '
+                                f'The burn-in has NOT been stopped.\n\n')
+        self._critical_alert = f'DANGEROUS smoke levels on atlaspc{self.atlaspc} - Burn-in stopped!'
+        self._critical_subject = f'BURN-IN STOPPED - CRITICAL ALERT - ATLASPC{self.atlaspc}'
+        self._critical_prefix = f'Dangerous smoke levels have been detected in the clean room on atlaspc{self.atlaspc}.\n\n'
+        self._critical_suffix = '\nThe burn-in has been stopped automatically for this channel.'
+    
+    def apply_settings(self, settings):
+        """Store settings and mirror the flags checked on every alert into plain attributes"""
+        self.settings = settings
+        self.email_enabled = settings.get('email_enabled') == 'true'
+        self.auto_shutdown_enabled = settings.get('auto_shutdown_enabled') == 'true'
+        # Parsed here rather than on every email
+        self._recipients = tuple(r.strip() for r in settings.get('email_recipients', '').split(',') if r.strip())
+        self._recipients_header = ', '.join(self._recipients)
+    
     def add_reading(self, values):
-        """Add a reading to the saved values"""
-        for key in ['R', 'G', 'IR']:
-            if key in values:
-                self.saved_values[key].append(values[key])
-            else:
-                self.saved_values[key].append(np.nan)
-    
-    def should_calculate_statistics(self):
-        """Check if it's time to calculate statistics"""
-        return time.time() - self.last_calculation_time >= self.calculation_interval
-    
-    def calculate_statistics(self):
-        """Calculate and save statistics for this channel"""
-        for light_type in self.saved_values.keys():
-            if len(self.saved_values[light_type]) > 0:
-                self.means[light_type] = np.nanmean(self.saved_values[light_type])
-                self.sds[light_type] = np.nanstd(self.saved_values[light_type])
-                self.saved_values[light_type] = []
-        
-        # Save to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO statistics (atlaspc, channel, R_mean, R_std, G_mean, G_std, IR_mean, IR_std) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (self.atlaspc, self.channel, self.means['R'], self.sds['R'], 
-              self.means['G'], self.sds['G'], 
-              self.means['IR'], self.sds['IR']))
-        conn.commit()
-        conn.close()
-        
-        self.logger.info(f"Statistics updated: R({self.means['R']:.2f}±{self.sds['R']:.2f}), "
-                        f"G({self.means['G']:.2f}±{self.sds['G']:.2f}), "
-                        f"IR({self.means['IR']:.2f}±{self.sds['IR']:.2f})")
-        
-        self.last_calculation_time = time.time()
+        """Fold a reading into the running statistics"""
+        for i, x in enumerate((values.get('R'), values.get('G'), values.get('IR'))):
+            if x is None or x != x:  # skip missing and NaN values
+                continue
+            n, mean, M2 = self._running[i]
+            n += 1
+            delta = x - mean
+            mean += delta / n
+            M2 += delta * (x - mean)
+            self._running[i] = (n, mean, M2)
+    
+    def should_calculate_statistics(self, now=None):
+        """Check if it's time to calculate statistics, now being a time.monotonic() value"""
+        if now is None:
+            now = time.monotonic()
+        return now - self.last_calculation_time >= self.calculation_interval
+    
+    def calculate_statistics(self, now=None):
+        """Calculate statistics for this channel, returning the statistics table row to save"""
+        for i, (n, mean, M2) in enumerate(self._running):
+            if n > 0:
+                sd = math.sqrt(M2 / n)  # population std, as np.nanstd
+                self.means[i] = mean
+                self.sds[i] = sd
+                self._inv_sigma[i] = 1.0 / sd if sd else np.nan
+                self._running[i] = (0, 0.0, 0.0)
+        
+        self.logger.info(f"Statistics updated: R({self.means[R]:.2f}±{self.sds[R]:.2f}), "
+                        f"G({self.means[G]:.2f}±{self.sds[G]:.2f}), "
+                        f"IR({self.means[IR]:.2f}±{self.sds[IR]:.2f})")
+        
+        self.last_calculation_time = time.monotonic() if now is None else now
+        
+        # A light type with no statistics yet is NaN, which sqlite3 stores as NULL
+        return (self.atlaspc, self.channel, float(self.means[R]), float(self.sds[R]),
+                float(self.means[G]), float(self.sds[G]),
+                float(self.means[IR]), float(self.sds[IR]))
     
     def is_calibrated(self):
         """Check if channel has been calibrated"""
-        return None not in self.means.values() and None not in self.sds.values()
+        return not np.isnan(self.sds).any()
     
-    def get_remaining_calibration_time(self):
-        """Get remaining time for calibration"""
-        return self.calculation_interval - (time.time() - self.last_calculation_time)
+    def get_remaining_calibration_time(self, now=None):
+        """Get remaining time for calibration, now being a time.monotonic() value"""
+        if now is None:
+            now = time.monotonic()
+        return self.calculation_interval - (now - self.last_calculation_time)
+    
+    def log_calibration_progress(self, now):
+        """Log the remaining calibration time, at most once every calibration_log_interval seconds"""
+        if now - self._last_calib_log < self.calibration_log_interval:
+            return
+        self._last_calib_log = now
+        remaining_time = self.get_remaining_calibration_time(now)
+        self.logger.info(f'Calibrating... Time remaining: {remaining_time:.0f}s')
     
     def calculate_z_scores(self, values):
-        """Calculate z-scores for current values"""
-        z_scores = {}
-        for key in ['R', 'G', 'IR']:
-            if (key in values and self.means[key] is not None 
-                and self.sds[key] is not None and self.sds[key] != 0):
-                z_scores[key] = (values[key] - self.means[key]) / self.sds[key]
-        return z_scores
-    
-    def save_alert(self, alert_type, message, values, z_scores):
-        """Save alert to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO alerts (atlaspc, channel, alert_type, message, R_value, G_value, IR_value, 
-                              R_zscore, G_zscore, IR_zscore) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (self.atlaspc, self.channel, alert_type, message, values.get('R'), values.get('G'), values.get('IR'),
-              z_scores.get('R'), z_scores.get('G'), z_scores.get('IR')))
-        conn.commit()
-        conn.close()
+        """Calculate the R, G, IR z-scores for current values, NaN where a value or sd is unavailable"""
+        v = np.array([values.get('R', np.nan), values.get('G', np.nan), values.get('IR', np.nan)], dtype=np.float64)
+        return (v - self.means) * self._inv_sigma
+    
+    @staticmethod
+    def _z_score_dict(z):
+        """Map a z-score vector to its light types, leaving out NaN entries"""
+        return {key: float(z_i) for key, z_i in zip(LIGHT_TYPES, z) if z_i == z_i}
+    
+    def _alert_row(self, alert_type, message, values, z):
+        """Build an alerts table row from the z-score vector; NaN z-scores are stored as NULL"""
+        return (self.atlaspc, self.channel, alert_type, message, values.get('R'), values.get('G'), values.get('IR'),
+                float(z[R]), float(z[G]), float(z[IR]))
     
     def send_email(self, message, subject, priority='3'):
-        """Send email notification"""
-        if self.settings.get('email_enabled') != 'true':
+        """Queue an email notification, returning the recipients it was queued for"""
+        if not self.email_enabled:
             return []
             
         try:
             sender = "no-reply@lps.umontreal.ca"
-            recipients = self.settings.get('email_recipients', '').split(',')
-            recipients = [r.strip() for r in recipients if r.strip()]
+            recipients = list(self._recipients)
             
             msg = MIMEText(message)
             msg['Subject'] = subject
             msg['From'] = sender
-            msg['To'] = ', '.join(recipients)
+            msg['To'] = self._recipients_header
             msg['X-Priority'] = priority
             
-            s = smtplib.SMTP('localhost')
-            s.sendmail(sender, recipients, msg.as_string())
-            s.quit()
-            
-            self.logger.info(f"Email sent to {recipients}: {subject}")
+            self.mailer.send(sender, recipients, msg, self.logger)
             return recipients
         except Exception as e:
-            self.logger.error(f"Failed to send email: {e}")
+            self.logger.error(f"Failed to queue email: {e}")
             return []
     
     def shutdown_power_supply(self):
@@ -161,77 +261,156 @@ class SmokeDetectorChannel:
             return False
     
     def check_alerts(self, values):
-        """Check for alert conditions and take appropriate action"""
+        """Check for alert conditions and take appropriate action, returning the alerts table rows to save"""
         if not self.is_calibrated():
-            return
+            return []
+        
+        z = self.calculate_z_scores(values)
+        triggered = np.abs(z) > 5  # only 5 sigma deviation will trigger alerts; NaN never triggers
+        if not triggered.any():
+            return []
         
-        z_scores = self.calculate_z_scores(values)
-        conditions = {}
+        # Nothing below runs on a quiet reading: label and format the z-scores only once an alert fires
+        z_scores = self._z_score_dict(z)  # for the log lines
+        z_lines = self.Z_SCORE_LINES % tuple(z)
         
-        for key in ['R', 'G', 'IR']:
-            if key in z_scores:
-                conditions[key] = abs(z_scores[key]) > 5  # only 5 sigma deviation will trigger alerts
+        # Alerts raised on this reading, saved by the monitor once all actions are taken
+        alerts = []
         
         # WARNING - any sensor triggered
-        if any(conditions.values()):
-            message = f'Concerning smoke levels detected on atlaspc{self.atlaspc}'
-            self.save_alert('WARNING', message, values, z_scores)
-            
-            warning_message = (f'Concerning smoke levels have been detected in the clean room on atlaspc{self.atlaspc}. '
-                             f'The burn-in has NOT been stopped.\n\n'
-                             f'RED values are {z_scores.get("R", np.nan):.2f} standard deviations from the mean.\n'
-                             f'GREEN values are {z_scores.get("G", np.nan):.2f} standard deviations from the mean.\n'
-                             f'IR values are {z_scores.get("IR", np.nan):.2f} standard deviations from the mean.')
+        alerts.append(self._alert_row('WARNING', self._warning_alert, values, z))
+        
+        warning_message = self._warning_prefix + z_lines
 
-            self.send_email(warning_message, f'SMOKE LEVEL WARNING - atlaspc{self.atlaspc}', priority='2')
-            self.logger.warning(f"SMOKE WARNING: {values} | Z-scores: {z_scores}")
+        self.send_email(warning_message, self._warning_subject, priority='2')
+        self.logger.warning(f"SMOKE WARNING: {values} | Z-scores: {z_scores}")
         
         # CRITICAL - all sensors triggered
-        if all(conditions.get(key, False) for key in ['R', 'G', 'IR']):
-            message = f'DANGEROUS smoke levels on atlaspc{self.atlaspc} - Burn-in stopped!'
-            self.save_alert('CRITICAL', message, values, z_scores)
+        if triggered.all():
+            alerts.append(self._alert_row('CRITICAL', self._critical_alert, values, z))
             
-            stop_message = (f'Dangerous smoke levels have been detected in the clean room on atlaspc{self.atlaspc}.\n\n'
-                          f'RED values are {z_scores.get("R", np.nan):.2f} standard deviations from the mean.\n'
-                          f'GREEN values are {z_scores.get("G", np.nan):.2f} standard deviations from the mean.\n'
-                          f'IR values are {z_scores.get("IR", np.nan):.2f} standard deviations from the mean.\n'
-                          f'The burn-in has been stopped automatically for this channel.')
+            stop_message = self._critical_prefix + z_lines + self._critical_suffix
 
-            self.send_email(stop_message, f'BURN-IN STOPPED - CRITICAL ALERT - ATLASPC{self.atlaspc}', priority='1')
+            self.send_email(stop_message, self._critical_subject, priority='1')
 
-            if self.settings.get('auto_shutdown_enabled') == 'true':
+            if self.auto_shutdown_enabled:
                 self.shutdown_power_supply()
 
             self.logger.critical(f"CRITICAL SMOKE ALERT: {values} | Z-scores: {z_scores}")
+        
+        return alerts
 
 
 class SmokeDetectorMonitor:
     """Main monitor that coordinates multiple smoke detector channels"""
     
+    # SQL reused on every call, kept constant so sqlite3's statement cache can reuse the compiled statements
+    SELECT_SETTINGS_SQL = 'SELECT key, value FROM settings'
+    UPSERT_SETTING_SQL = 'INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)'
+    INSERT_DEFAULT_SETTING_SQL = 'INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)'
+    INSERT_STATISTICS_SQL = '''
+        INSERT INTO statistics (atlaspc, channel, R_mean, R_std, G_mean, G_std, IR_mean, IR_std) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    INSERT_ALERT_SQL = '''
+        INSERT INTO alerts (atlaspc, channel, alert_type, message, R_value, G_value, IR_value, 
+                          R_zscore, G_zscore, IR_zscore) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    INSERT_READING_SQL = 'INSERT INTO readings (timestamp, atlaspc, channel, R, G, IR) VALUES (?, ?, ?, ?, ?, ?)'
+    DELETE_OLD_READINGS_SQL = '''
+        DELETE FROM readings WHERE id IN (
+            SELECT id FROM readings WHERE timestamp < ? LIMIT ?
+        )
+    '''
+    DATA_VERSION_SQL = 'PRAGMA data_version'
+    
     def __init__(self, config, db_path="smoke_detector.db"):
         self.config = config
         self.arduino_port = config['arduino_port']
         self.db_path = db_path
         self.arduino_serial = None
-        self.restart_time = time.time() + config['restart_time']*3600  # Restart every 10 hours
+        
+        # Readings are buffered and written in batches to amortize commits, flushed once
+        # readings_buffer_size rows are waiting or readings_flush_interval seconds have passed
+        self._pending_rows = deque()
+        self.readings_buffer_size = 64
+        self.readings_flush_interval = 5
+        self._last_flush = time.monotonic()
+        # Statistics and alert rows produced by the channels, written together at the end of each loop iteration
+        self._pending_stats = []
+        self._pending_alerts = []
+        # Interval bookkeeping uses time.monotonic(), which wall-clock adjustments cannot move
+        self.restart_time = time.monotonic() + config['restart_time']*3600  # Restart every 10 hours
+        
+        # Single long-lived connection for all writes, closed by _shutdown
+        self.conn = self._connect()
+        self._closed = False
+        
+        # Email goes out from a background thread shared by all channels
+        self.mailer = EmailSender()
+        
+        # All channels log through one queue to a single file, written by a background listener
+        self.log_queue = queue.Queue(-1)
+        self._log_listener = self._setup_log_listener()
+        
+        # Retention runs on a background timer with its own connection, off the reading loop
+        self.retention_days = 30
+        self.retention_interval = 3600
+        self.retention_batch_size = 10000  # rows deleted per transaction, so the write lock is held briefly
+        self._retention_timer = None
+        # Held while scheduling and by _shutdown, so a running tick cannot re-arm a cancelled timer
+        self._retention_lock = threading.Lock()
         
         # Initialize database
         self.setup_database()
         
-        # Load settings
+        # Load settings; the main loop re-reads them only once another connection has committed
+        self._data_version = self.conn.execute(self.DATA_VERSION_SQL).fetchone()[0]
+        self._defaults_ensured = False
         self.settings = self.load_settings()
+        self.monitoring_active = self.settings.get('monitoring_active') == 'true'
         
         # Dictionary to store channel objects
         self.channels = {}
         self.atlaspc_channel_map = config['atlaspc_channel_map']
         
+    def _setup_log_listener(self):
+        """Start the background listener that writes every channel's log records to one file"""
+        fh = logging.FileHandler('smoke_detector.log')
+        fh.setLevel(logging.INFO)
+        
+        # Create formatter; %(name)s is the atlaspc and channel of the record
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        fh.setFormatter(formatter)
+        
+        listener = logging.handlers.QueueListener(self.log_queue, fh, respect_handler_level=True)
+        listener.start()
+        return listener
+    
+    def _connect(self):
+        """Open a database connection with the per-connection pragmas applied"""
+        conn = sqlite3.connect(self.db_path, cached_statements=128)
+        # These pragmas do not persist in the database file, so every connection
+        # (including the dashboard's reader, which sets its own busy_timeout) needs them
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA wal_autocheckpoint=1000')
+        conn.execute('PRAGMA busy_timeout=5000')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute('PRAGMA cache_size=-20000')  # ~20 MB page cache
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+        
     def setup_database(self):
         """Initialize SQLite database for data storage"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create tables with channel field
-        cursor.execute('''
+        # One script, so setup is a single call; the schema is created in one transaction
+        self.conn.executescript('''
+            -- WAL lets the dashboard read while the monitor writes; the mode persists in the file
+            PRAGMA journal_mode=WAL;
+            
+            BEGIN;
+            
+            -- Create tables with channel field
             CREATE TABLE IF NOT EXISTS readings (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -240,16 +419,17 @@ class SmokeDetectorMonitor:
                 R INTEGER,
                 G INTEGER,
                 IR INTEGER
-            )
-        ''')
-        
-        # Create index for faster channel-based queries
-        cursor.execute('''
+            );
+            
+            -- Create index for faster channel-based queries
             CREATE INDEX IF NOT EXISTS idx_atlaspc_timestamp 
-            ON readings(atlaspc, timestamp)
-        ''')
-        
-        cursor.execute('''
+            ON readings(atlaspc, timestamp);
+            
+            -- Covering index for time-window queries spanning all atlaspcs, so the
+            -- dashboard's plot window is served from the index without touching the table
+            CREATE INDEX IF NOT EXISTS idx_readings_timestamp_covering 
+            ON readings(timestamp, atlaspc, R, G, IR);
+            
             CREATE TABLE IF NOT EXISTS statistics (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -261,15 +441,11 @@ class SmokeDetectorMonitor:
                 G_std REAL,
                 IR_mean REAL,
                 IR_std REAL
-            )
-        ''')
-        
-        cursor.execute('''
+            );
+            
             CREATE INDEX IF NOT EXISTS idx_stats_atlaspc_timestamp 
-            ON statistics(atlaspc, timestamp)
-        ''')
-        
-        cursor.execute('''
+            ON statistics(atlaspc, timestamp);
+            
             CREATE TABLE IF NOT EXISTS alerts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -283,33 +459,21 @@ class SmokeDetectorMonitor:
                 R_zscore REAL,
                 G_zscore REAL,
                 IR_zscore REAL
-            )
-        ''')
-        
-        cursor.execute('''
+            );
+            
             CREATE INDEX IF NOT EXISTS idx_alerts_atlaspc_timestamp 
-            ON alerts(atlaspc, timestamp)
-        ''')
-        
-        cursor.execute('''
+            ON alerts(atlaspc, timestamp);
+            
             CREATE TABLE IF NOT EXISTS settings (
                 key TEXT PRIMARY KEY,
                 value TEXT
-            )
+            );
+            
+            COMMIT;
         ''')
         
-        conn.commit()
-        conn.close()
-        
     def load_settings(self):
         """Load settings from database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT key, value FROM settings')
-        settings = dict(cursor.fetchall())
-        conn.close()
-        
         # Default settings
         defaults = {
             'email_enabled': 'false',
@@ -318,28 +482,39 @@ class SmokeDetectorMonitor:
             'monitoring_active': 'false'
         }
         
-        for key, value in defaults.items():
-            if key not in settings:
-                self.update_setting(key, value)
-                settings[key] = value
-                
-        return settings
+        # Fill in any missing defaults in one transaction; existing values are left alone.
+        # Only needed once per run, since nothing deletes settings afterwards
+        if not self._defaults_ensured:
+            with self.conn:
+                self.conn.executemany(self.INSERT_DEFAULT_SETTING_SQL, defaults.items())
+            self._defaults_ensured = True
+        
+        return dict(self.conn.execute(self.SELECT_SETTINGS_SQL).fetchall())
+    
+    def database_changed(self):
+        """Check whether another connection (e.g. the dashboard) has committed since the last check"""
+        data_version = self.conn.execute(self.DATA_VERSION_SQL).fetchone()[0]
+        if data_version == self._data_version:
+            return False
+        self._data_version = data_version
+        return True
     
     def update_setting(self, key, value):
         """Update a setting in the database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, value))
-        conn.commit()
-        conn.close()
+        self.conn.execute(self.UPSERT_SETTING_SQL, (key, value))
+        self.conn.commit()
         if not hasattr(self, "settings"):
             self.settings = {}
         self.settings[key] = value
+        self.monitoring_active = self.settings.get('monitoring_active') == 'true'
+        for channel in getattr(self, "channels", {}).values():
+            channel.apply_settings(self.settings)
     
     def get_or_create_channel(self, atlaspc, channel_number):
         """Get existing channel or create new one"""
         if channel_number not in self.channels:
-            self.channels[channel_number] = SmokeDetectorChannel(self.config, atlaspc, channel_number, self.db_path, self.settings)
+            self.channels[channel_number] = SmokeDetectorChannel(self.config, atlaspc, channel_number,
+                                                                 self.settings, self.mailer, self.log_queue)
         return self.channels[channel_number]
     
     def connect_arduino(self):
@@ -347,7 +522,15 @@ class SmokeDetectorMonitor:
         try:
             if self.arduino_serial:
                 self.arduino_serial.close()
-            self.arduino_serial = serial.Serial(self.arduino_port, 115200, timeout=1)
+            # Timeout a bit above the expected gap between frames, so readline paces the loop
+            self.arduino_serial = serial.Serial(self.arduino_port, 115200, timeout=2)
+            # Ask the USB-serial driver to hand bytes over immediately instead of batching them
+            try:
+                self.arduino_serial.set_low_latency_mode(True)
+            except (AttributeError, NotImplementedError, ValueError, OSError) as e:
+                print(f"Low latency mode not available: {e}")
+            # Drop whatever backlog built up before (re)connecting
+            self.arduino_serial.reset_input_buffer()
             print("Connected to Arduino")
             return True
         except Exception as e:
@@ -355,148 +538,235 @@ class SmokeDetectorMonitor:
             return False
         
     def parse_line(self, line):
-        """Parse a line from Arduino output"""
-        try:
-            parts = [p.strip() for p in line.split(";")]
-
-            if len(parts) < 5 or "CH" not in parts[0]:
-                return {}
-            
-            if any(x not in line for x in ['CH', 'R', 'G', 'IR']):
-                raise ValueError("Incomplete data from sensor")
-            
-            ch_label, ch_value = parts[0].split(':')
-            R_label, R_value = parts[1].split(':')
-            IR_label, IR_value = parts[2].split(':')
-            G_label, G_value = parts[3].split(':')
-            
-            return {
-                ch_label: int(ch_value),
-                R_label: int(R_value),
-                IR_label: int(IR_value),
-                G_label: int(G_value),
-            }
-        except Exception as e:
-            print(f"Error parsing line: {e}")
+        """Parse a raw line of Arduino output"""
+        match = FRAME_RE.search(line)
+        if match is None:
+            if line.lstrip().startswith(b'CH'):
+                print(f"Error parsing line: incomplete data from sensor: {line!r}")
             return {}
+        
+        ch_value, R_value, IR_value, G_value = match.groups()
+        return {
+            'CH': int(ch_value),
+            'R': int(R_value),
+            'IR': int(IR_value),
+            'G': int(G_value),
+        }
     
     def read_smoke_detector(self):
-        """Read values from Arduino smoke detector"""
+        """Read every frame waiting from the Arduino smoke detector, blocking for the first line"""
         if not self.arduino_serial:
-            return {}
-            
+            return []
+        
+        frames = []
         try:
-            arduino_readout = self.arduino_serial.readline().decode("utf-8", errors="ignore").strip()
-
-            # Log which ports have sensors connected
-            if arduino_readout.startswith("STATUS"):
-                ch, present = arduino_readout.split(";")[2], arduino_readout.split(";")[4]
-                if str(present)=='yes': 
-                    print(f"A sensor is connected to channel: {ch}")
-
-            return self.parse_line(arduino_readout)
+            arduino_readout = self.arduino_serial.readline()
+            while True:
+                # Log which ports have sensors connected
+                if arduino_readout.startswith(b"STATUS"):
+                    status = arduino_readout.decode("utf-8", errors="ignore").strip().split(";")
+                    ch, present = status[2], status[4]
+                    if str(present)=='yes': 
+                        print(f"A sensor is connected to channel: {ch}")
+                
+                values = self.parse_line(arduino_readout)
+                if values:
+                    frames.append(values)
+                
+                # Drain the backlog so it cannot build up; every frame is kept since
+                # the channels are multiplexed on this one line
+                if not self.arduino_serial.in_waiting:
+                    break
+                arduino_readout = self.arduino_serial.readline()
         except Exception as e:
             print(f"Error reading from Arduino: {e}")
-            return {}
+            # readline only paces the loop on a healthy port; a failing one raises at once
+            time.sleep(1)
+        return frames
+    
+    def save_reading(self, atlaspc, channel, values, now=None):
+        """Buffer a reading for the next batched write to the database"""
+        # Timestamp is taken now, in the CURRENT_TIMESTAMP format, since rows are inserted later
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        self._pending_rows.append((timestamp, atlaspc, channel, values.get('R'), values.get('G'), values.get('IR')))
+        if now is None:
+            now = time.monotonic()
+        if (len(self._pending_rows) >= self.readings_buffer_size
+                or now - self._last_flush >= self.readings_flush_interval):
+            self.flush_readings()
+    
+    def flush_readings(self):
+        """Write all buffered readings to the database in a single transaction"""
+        self._last_flush = time.monotonic()
+        if not self._pending_rows:
+            return
+        with self.conn:
+            self.conn.executemany(self.INSERT_READING_SQL, self._pending_rows)
+        self._pending_rows.clear()
     
-    def save_reading(self, atlaspc, channel, values):
-        """Save reading to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO readings (atlaspc, channel, R, G, IR) VALUES (?, ?, ?, ?, ?)
-        ''', (atlaspc, channel, values.get('R'), values.get('G'), values.get('IR')))
-        conn.commit()
-        conn.close()
+    def flush_events(self):
+        """Write the statistics and alerts collected this iteration in a single transaction"""
+        if not self._pending_stats and not self._pending_alerts:
+            return
+        with self.conn:
+            if self._pending_stats:
+                self.conn.executemany(self.INSERT_STATISTICS_SQL, self._pending_stats)
+            if self._pending_alerts:
+                self.conn.executemany(self.INSERT_ALERT_SQL, self._pending_alerts)
+        self._pending_stats.clear()
+        self._pending_alerts.clear()
 
-    def cleanup_old_readings(self, retention_days=30):
+    def _schedule_retention(self, delay):
+        """Run the retention policy in the background after delay seconds, unless shut down"""
+        with self._retention_lock:
+            if self._closed:
+                return
+            self._retention_timer = threading.Timer(delay, self._retention_tick)
+            self._retention_timer.daemon = True
+            self._retention_timer.start()
+    
+    def _retention_tick(self):
+        """Apply the retention policy on a separate connection, then schedule the next run"""
+        try:
+            conn = self._connect()
+            try:
+                self.cleanup_old_readings(self.retention_days, conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Retention policy error: {e}")
+        self._schedule_retention(self.retention_interval)
+    
+    def cleanup_old_readings(self, retention_days=30, conn=None):
         """Delete readings older than retention_days from database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            DELETE FROM readings
-            WHERE timestamp < datetime('now', ?)
-        ''', (f'-{retention_days} days',))
-        deleted = cursor.rowcount
-        conn.commit()
-        conn.close()
+        conn = conn or self.conn
+        # Cutoff computed here in the stored CURRENT_TIMESTAMP format, so the DELETE is a plain bound on the index
+        cutoff = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(time.time() - retention_days * 86400))
+        deleted = 0
+        while True:
+            cursor = conn.execute(self.DELETE_OLD_READINGS_SQL, (cutoff, self.retention_batch_size))
+            conn.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < self.retention_batch_size:
+                break
     
         if deleted > 0:
             print(f"Retention policy applied: {deleted} old readings deleted (>{retention_days} days old).")
 
+    def process_reading(self, values, now):
+        """Store one parsed frame and run its channel's statistics and alert checks at time.monotonic() now"""
+        channel_number = values['CH']
+
+        try: 
+            atlaspc = self.atlaspc_channel_map[channel_number]
+        except KeyError:
+            raise ValueError(f"Channel {channel_number} is not mapped to an atlaspc.")
+        
+        # Get or create channel
+        channel = self.get_or_create_channel(atlaspc, channel_number)
+        
+        # Save reading
+        self.save_reading(atlaspc, channel_number, values, now)
+        
+        # Add reading to channel
+        channel.add_reading(values)
+        
+        # Calculate statistics if needed
+        if channel.should_calculate_statistics(now):
+            self.flush_readings()
+            self._pending_stats.append(channel.calculate_statistics(now))
+        
+        # Check for alerts or log calibration status
+        if channel.is_calibrated():
+            self._pending_alerts.extend(channel.check_alerts(values))
+        else:
+            channel.log_calibration_progress(now)
+    
+    def _shutdown(self):
+        """Stop background work, write what is pending and close the serial port and database"""
+        with self._retention_lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._retention_timer:
+                self._retention_timer.cancel()
+        if self.arduino_serial:
+            self.arduino_serial.close()
+        self.flush_readings()
+        self.flush_events()
+        self.update_setting('monitoring_active', 'false')
+        self.mailer.close()
+        # After the mailer, whose worker logs to the channels; stopping writes out queued records
+        self._log_listener.stop()
+        for handler in self._log_listener.handlers:
+            handler.close()
+        self.conn.close()
+    
+    def _soft_restart(self):
+        """Reopen the serial port and start channels afresh, keeping the database, mailer and log listener"""
+        self.flush_readings()
+        self.flush_events()
+        if self.arduino_serial:
+            self.arduino_serial.close()
+        time.sleep(1)
+        
+        if not self.connect_arduino():
+            print("Failed to reconnect to Arduino. Stopping.")
+            self.monitoring_active = False
+            return
+        
+        # New channels recalibrate from scratch, as after a full restart
+        self.channels.clear()
+        self.restart_time = time.monotonic() + self.config['restart_time']*3600
+    
     def run(self):
         """Main monitoring loop"""
         print("Starting smoke detector monitoring...")
         
         if not self.connect_arduino():
             print("Failed to connect to Arduino. Exiting.")
+            self._shutdown()
             return
         
         self.update_setting('monitoring_active', 'true')
         
+        # Apply retention once at startup too, rather than only after the first retention_interval
+        self._schedule_retention(0)
+        
         try:
-            while self.settings.get('monitoring_active') == 'true':
-                
-                # Check for scheduled restart
-                if time.time() >= self.restart_time:
-                    print("Restarting monitoring script to prevent error excess.")
-                    if self.arduino_serial:
-                        self.arduino_serial.close()
-                        self.update_setting('monitoring_active', 'false')
-                        
-                        # Restart the script
-                        os.execv(sys.executable, ['python'] + sys.argv)
-
-                # Reload settings periodically
-                self.settings = self.load_settings()
+            while self.monitoring_active:
                 
-                # Update settings for all existing channels
-                for channel in self.channels.values():
-                    channel.settings = self.settings
+                # Read and process every frame that has arrived; the clock is read once per iteration
+                frames = self.read_smoke_detector()
+                now = time.monotonic()
+                for values in frames:
+                    self.process_reading(values, now)
+                self.flush_events()
+                # The readline timeout bounds each iteration, so buffered readings still go out when the Arduino is quiet
+                if now - self._last_flush >= self.readings_flush_interval:
+                    self.flush_readings()
                 
-                # Read values
-                values = self.read_smoke_detector()
-                
-                if len(values) > 0 and 'CH' in values:
-                    channel_number = values['CH']
+                # Check for scheduled restart
+                if now >= self.restart_time:
+                    print("Restarting monitoring to prevent error excess.")
+                    self._soft_restart()
 
-                    try: 
-                        atlaspc = self.atlaspc_channel_map[channel_number]
-                    except KeyError:
-                        raise ValueError(f"Channel {channel_number} is not mapped to an atlaspc.")
+                # Reload settings when another connection has written to the database; this is a
+                # cheap header check, and the monitor's own writes already update self.settings
+                if self.database_changed():
+                    self.settings = self.load_settings()
+                    self.monitoring_active = self.settings.get('monitoring_active') == 'true'
                     
-                    # Get or create channel
-                    channel = self.get_or_create_channel(atlaspc, channel_number)
-                    
-                    # Save reading
-                    self.save_reading(atlaspc, channel_number, values)
-                    
-                    # Add reading to channel
-                    channel.add_reading(values)
-                    
-                    # Calculate statistics if needed
-                    if channel.should_calculate_statistics():
-                        channel.calculate_statistics()
-                        # Run retention policy periodically
-                        self.cleanup_old_readings(retention_days=30)
-                    
-                    # Check for alerts or log calibration status
-                    if channel.is_calibrated():
-                        channel.check_alerts(values)
-                    else:
-                        remaining_time = channel.get_remaining_calibration_time()
-                        channel.logger.info(f'Calibrating... Time remaining: {remaining_time:.0f}s')
-                
-                time.sleep(1)  # 1 second between readings
+                    # Update settings for all existing channels
+                    for channel in self.channels.values():
+                        channel.apply_settings(self.settings)
                 
         except KeyboardInterrupt:
             print("Monitoring stopped by user")
         except Exception as e:
             print(f"Monitoring error: {e}")
         finally:
-            if self.arduino_serial:
-                self.arduino_serial.close()
-            self.update_setting('monitoring_active', 'false')
+            self._shutdown()
             print("Monitoring stopped")
 
 if __name__ == "__main__":